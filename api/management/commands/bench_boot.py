@@ -0,0 +1,89 @@
+import json
+import os
+import subprocess
+import sys
+from statistics import median
+from time import perf_counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+FIRST_REQUEST_SCRIPT = '''
+import json
+import sys
+from time import perf_counter, process_time
+
+started = perf_counter()
+from django.core.wsgi import get_wsgi_application
+
+application = get_wsgi_application()
+booted = perf_counter()
+
+statuses = []
+environ = {
+    'REQUEST_METHOD': 'GET',
+    'PATH_INFO': sys.argv[1],
+    'QUERY_STRING': '',
+    'SERVER_NAME': 'localhost',
+    'SERVER_PORT': '80',
+    'HTTP_ACCEPT': 'application/json',
+    'wsgi.url_scheme': 'http',
+    'wsgi.input': sys.stdin.buffer,
+    'wsgi.errors': sys.stderr,
+}
+b''.join(application(environ, lambda status, headers: statuses.append(status)))
+print(json.dumps({
+    'boot': booted - started,
+    'first_response': perf_counter() - started,
+    'cpu': process_time(),
+    'status': statuses[0],
+}))
+'''
+
+
+class Command(BaseCommand):
+    help = (
+        'Измеряет время от запуска воркера до первого ответа '
+        'для одного или нескольких модулей настроек.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'settings_modules', nargs='*',
+            default=['shop_project.settings', 'shop_project.settings_api']
+        )
+        parser.add_argument('--path', default='/api/categories/')
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        for settings_module in options['settings_modules']:
+            env = dict(os.environ, DJANGO_SETTINGS_MODULE=settings_module)
+            runs = []
+            for _ in range(options['repeat']):
+                started = perf_counter()
+                result = subprocess.run(
+                    [sys.executable, '-c', FIRST_REQUEST_SCRIPT,
+                     options['path']],
+                    cwd=settings.BASE_DIR, env=env,
+                    capture_output=True, text=True, stdin=subprocess.DEVNULL
+                )
+                if result.returncode:
+                    self.stderr.write(result.stderr[-2000:])
+                    break
+                run = json.loads(result.stdout.splitlines()[-1])
+                run['process'] = perf_counter() - started
+                runs.append(run)
+            if not runs:
+                continue
+
+            timings = {
+                key: median(run[key] for run in runs) * 1000
+                for key in ('boot', 'first_response', 'process', 'cpu')
+            }
+            self.stdout.write(
+                f'{settings_module} ({runs[0]["status"]}): '
+                f'запуск Django {timings["boot"]:.0f} мс, '
+                f'первый ответ {timings["first_response"]:.0f} мс, '
+                f'процесс целиком {timings["process"]:.0f} мс, '
+                f'CPU до первого ответа {timings["cpu"]:.0f} мс'
+            )
@@ -0,0 +1,107 @@
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from statistics import median
+from time import perf_counter
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from products.models import Product, ShoppingCart, Order
+
+BENCH_PREFIX = 'bench-checkout'
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный тест оформления заказов: много пользователей '
+        'одновременно оформляют корзины с общими продуктами. '
+        'Тестовые данные удаляются после прогона.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=50)
+        parser.add_argument('--products', type=int, default=10)
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument(
+            '--retries', type=int, default=1,
+            help='Сколько повторов с тем же ключом отправляет клиент'
+        )
+
+    def handle(self, *args, **options):
+        users, products = self.create_data(
+            options['users'], options['products']
+        )
+        try:
+            self.run(users, options['threads'], options['retries'])
+        finally:
+            User.objects.filter(username__startswith=BENCH_PREFIX).delete()
+            Product.objects.filter(slug__startswith=BENCH_PREFIX).delete()
+
+    def create_data(self, users_count, products_count):
+        products = [
+            Product.objects.create(
+                name=f'{BENCH_PREFIX} {i}',
+                slug=f'{BENCH_PREFIX}-{i}',
+                price=Decimal('99.90') + i,
+                image_small='bench.png',
+                image_medium='bench.png',
+                image_large='bench.png'
+            )
+            for i in range(products_count)
+        ]
+        User.objects.bulk_create(
+            User(username=f'{BENCH_PREFIX}-{i}')
+            for i in range(users_count)
+        )
+        users = list(User.objects.filter(username__startswith=BENCH_PREFIX))
+        ShoppingCart.objects.bulk_create(
+            ShoppingCart(user=user, product=product, quantity=Decimal('1.5'))
+            for user in users
+            for product in products
+        )
+        return users, products
+
+    def run(self, users, threads, retries):
+        def checkout(job):
+            user, key = job
+            started = perf_counter()
+            try:
+                order, created = Order.objects.checkout(user, key)
+                return perf_counter() - started, created, None
+            except Exception as error:
+                return perf_counter() - started, False, error
+            finally:
+                connection.close()
+
+        jobs = [
+            (user, f'{BENCH_PREFIX}-{user.pk}')
+            for user in users
+            for _ in range(1 + retries)
+        ]
+        started = perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            results = list(executor.map(checkout, jobs))
+        elapsed = perf_counter() - started
+
+        timings = sorted(result[0] for result in results)
+        errors = [result[2] for result in results if result[2] is not None]
+        created = sum(result[1] for result in results)
+        orders = Order.objects.filter(
+            user__username__startswith=BENCH_PREFIX
+        ).count()
+
+        self.stdout.write(
+            f'{connection.vendor}: {len(jobs)} запросов в {threads} потоков '
+            f'за {elapsed:.2f} с ({len(jobs) / elapsed:.0f} запросов/с)'
+        )
+        self.stdout.write(
+            f'медиана {median(timings) * 1000:.1f} мс, '
+            f'p95 {timings[int(len(timings) * 0.95)] * 1000:.1f} мс'
+        )
+        self.stdout.write(
+            f'создано заказов: {created}, в БД: {orders}, '
+            f'пользователей: {len(users)}, ошибок: {len(errors)}'
+        )
+        for error in errors[:5]:
+            self.stdout.write(f'  {type(error).__name__}: {error}')
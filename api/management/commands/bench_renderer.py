@@ -0,0 +1,69 @@
+from decimal import Decimal
+from timeit import timeit
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from api import renderers
+from api.renderers import ShopJSONRenderer
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает время кодирования и размер ответа '
+        'JSONRenderer и ShopJSONRenderer на странице из N строк.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000)
+        parser.add_argument('--repeat', type=int, default=50)
+
+    def handle(self, *args, **options):
+        rows, repeat = options['rows'], options['repeat']
+        data = {
+            'count': rows,
+            'results': [
+                {
+                    'name': f'Продукт {i}',
+                    'slug': f'product-{i}',
+                    'category': 'Категория',
+                    'subcategory': 'Подкатегория',
+                    'price': Decimal('199.90') + i,
+                    'quantity': Decimal('1.5'),
+                    'total_product_price': (Decimal('199.90') + i) * 2,
+                    'images': {
+                        'small': f'/media/products/small/{i}.png',
+                        'medium': f'/media/products/medium/{i}.png',
+                        'large': f'/media/products/large/{i}.png',
+                    },
+                }
+                for i in range(rows)
+            ]
+        }
+
+        self.stdout.write(
+            f'orjson: {"да" if renderers.orjson else "нет"}, '
+            f'brotli: {"да" if renderers.brotli else "нет"}'
+        )
+        shop_renderer = ShopJSONRenderer()
+        for renderer in (JSONRenderer(), shop_renderer):
+            seconds = timeit(lambda: renderer.render(data), number=repeat)
+            self.stdout.write(
+                f'{type(renderer).__name__}: '
+                f'{seconds / repeat * 1000:.2f} мс на страницу'
+            )
+
+        content = shop_renderer.render(data)
+        self.stdout.write(f'identity: {len(content)} байт')
+        encodings = ['gzip'] + (['br'] if renderers.brotli else [])
+        for encoding in encodings:
+            compressed = shop_renderer.compress(content, encoding)
+            seconds = timeit(
+                lambda: shop_renderer.compress(content, encoding),
+                number=repeat
+            )
+            self.stdout.write(
+                f'{encoding}: {len(compressed)} байт '
+                f'({len(compressed) / len(content):.1%}), '
+                f'{seconds / repeat * 1000:.2f} мс'
+            )
@@ -0,0 +1,55 @@
+from timeit import timeit
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.throttling import (
+    LocalBucketStore, SharedMemoryBucketStore, TokenBucketThrottle,
+    get_bucket_store
+)
+from api.views import ProductCategoryViewSet
+
+
+class Command(BaseCommand):
+    help = 'Измеряет время одной проверки TokenBucketThrottle.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=100_000)
+        parser.add_argument('--keys', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        repeat, keys = options['repeat'], options['keys']
+        for store_class in (LocalBucketStore, SharedMemoryBucketStore):
+            try:
+                store = store_class()
+            except ImproperlyConfigured as error:
+                self.stdout.write(f'{store_class.__name__} пропущен: {error}')
+                continue
+            counter = iter(range(repeat))
+            seconds = timeit(
+                lambda: store.consume(
+                    f'throttle:bench:{next(counter) % keys}',
+                    600, 10.0, 0.0
+                ),
+                number=repeat
+            )
+            self.stdout.write(
+                f'{type(store).__name__}.consume: '
+                f'{seconds / repeat * 1_000_000:.2f} мкс'
+            )
+
+        request = Request(APIRequestFactory().get('/api/products/'))
+        request.user = AnonymousUser()
+        view = ProductCategoryViewSet()
+        throttle = TokenBucketThrottle()
+        seconds = timeit(
+            lambda: throttle.allow_request(request, view), number=repeat
+        )
+        self.stdout.write(
+            f'TokenBucketThrottle.allow_request '
+            f'({type(get_bucket_store()).__name__}): '
+            f'{seconds / repeat * 1_000_000:.2f} мкс'
+        )
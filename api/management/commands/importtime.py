@@ -0,0 +1,91 @@
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+IMPORT_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+BOOT_SCRIPT = '''
+import django
+django.setup()
+from django.core.wsgi import get_wsgi_application
+get_wsgi_application()
+'''
+
+FIRST_REQUEST_SCRIPT = BOOT_SCRIPT + '''
+from importlib import import_module
+from django.conf import settings
+import_module(settings.ROOT_URLCONF)
+'''
+
+
+class Command(BaseCommand):
+    help = (
+        'Профиль импортов при запуске воркера (python -X importtime): '
+        'самые дорогие модули и суммарное время по пакетам.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--settings-module', default=os.environ.get(
+                'DJANGO_SETTINGS_MODULE', 'shop_project.settings'
+            )
+        )
+        parser.add_argument(
+            '--boot-only', action='store_true',
+            help='Без импорта urlconf, который происходит на первом запросе'
+        )
+        parser.add_argument(
+            '--sort', choices=('self', 'cumulative'), default='cumulative'
+        )
+        parser.add_argument('--limit', type=int, default=25)
+
+    def handle(self, *args, **options):
+        script = BOOT_SCRIPT if options['boot_only'] else FIRST_REQUEST_SCRIPT
+        env = dict(
+            os.environ, DJANGO_SETTINGS_MODULE=options['settings_module']
+        )
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', script],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True
+        )
+
+        modules = []
+        for line in result.stderr.splitlines():
+            match = IMPORT_LINE.match(line)
+            if match:
+                own, cumulative, indent, name = match.groups()
+                modules.append(
+                    (name, int(own), int(cumulative), len(indent) // 2)
+                )
+        if result.returncode or not modules:
+            self.stderr.write(result.stderr[-2000:])
+            return
+
+        packages = defaultdict(int)
+        for name, own, _, _ in modules:
+            packages[name.split('.')[0]] += own
+        total = sum(packages.values())
+
+        self.stdout.write(
+            f'{options["settings_module"]}: {len(modules)} модулей, '
+            f'{total / 1000:.1f} мс на импорт'
+        )
+        key = 1 if options['sort'] == 'self' else 2
+        self.stdout.write(f'\n{"self, мс":>9} {"cumul., мс":>11}  модуль')
+        for name, own, cumulative, _ in sorted(
+            modules, key=lambda module: module[key], reverse=True
+        )[:options['limit']]:
+            self.stdout.write(
+                f'{own / 1000:9.1f} {cumulative / 1000:11.1f}  {name}'
+            )
+
+        self.stdout.write(f'\n{"мс":>9}  пакет')
+        for package, own in sorted(
+            packages.items(), key=lambda item: item[1], reverse=True
+        )[:options['limit']]:
+            self.stdout.write(f'{own / 1000:9.1f}  {package}')
@@ -0,0 +1,36 @@
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from .query_guard import QueryGuard, get_view_budget, logger
+
+
+class QueryBudgetMiddleware:
+    """
+    Пишет в лог api.query_guard предупреждение, если запрос нарушил
+    бюджет представления, выполнил N+1 или медленный SQL.
+
+    Работает, только если QUERY_GUARD_ENABLED (по умолчанию - DEBUG).
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'QUERY_GUARD_ENABLED', settings.DEBUG):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.query_guard = QueryGuard()
+        with request.query_guard:
+            response = self.get_response(request)
+
+        problems = request.query_guard.problems()
+        if problems:
+            logger.warning(
+                '%s %s: %s', request.method, request.path,
+                '\n'.join(problems)
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.query_guard.budget = get_view_budget(
+            view_func, request.method
+        )
@@ -0,0 +1,164 @@
+import logging
+import re
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass
+from time import perf_counter
+
+from django.conf import settings
+from django.db import connections
+from django.urls import resolve
+
+logger = logging.getLogger('api.query_guard')
+
+IN_LIST = re.compile(r'\((?:\s*%s\s*,)+\s*%s\s*\)')
+NUMBER = re.compile(r'\b\d+\b')
+STRING = re.compile(r"'(?:[^']|'')*'")
+SPACES = re.compile(r'\s+')
+TRANSACTION_CONTROL = re.compile(
+    r'^\s*(?:BEGIN|COMMIT|ROLLBACK|SAVEPOINT|RELEASE)\b', re.IGNORECASE
+)
+
+
+def normalize_sql(sql):
+    sql = STRING.sub('?', sql)
+    sql = NUMBER.sub('?', sql)
+    sql = IN_LIST.sub('(...)', sql)
+    return SPACES.sub(' ', sql).strip()
+
+
+def get_query_budget(view_class, action=None):
+    """
+    Бюджет запросов представления: query_budgets[action], иначе
+    query_budget, иначе None (без ограничения).
+    """
+    budgets = getattr(view_class, 'query_budgets', {})
+    return budgets.get(action, getattr(view_class, 'query_budget', None))
+
+
+def get_view_budget(view_func, method):
+    view_class = getattr(view_func, 'cls', None)
+    if view_class is None:
+        return None
+    actions = getattr(view_func, 'actions', None) or {}
+    return get_query_budget(view_class, actions.get(method.lower()))
+
+
+@dataclass
+class Query:
+    alias: str
+    sql: str
+    params: tuple
+    duration: float
+
+    @property
+    def shape(self):
+        return normalize_sql(self.sql)
+
+
+class QueryGuard:
+    """
+    Записывает SQL, выполненный внутри блока, на всех подключениях.
+
+    Проблемы: превышен бюджет, одинаковый по форме запрос повторён
+    repeat_threshold и более раз (N+1), запрос дольше slow_ms.
+    Команды управления транзакциями (BEGIN, SAVEPOINT и т. п.) не
+    учитываются: в тестах они отличаются от рабочего окружения.
+    """
+
+    def __init__(self, budget=None, repeat_threshold=None, slow_ms=None):
+        self.budget = budget
+        self.repeat_threshold = repeat_threshold or getattr(
+            settings, 'QUERY_GUARD_REPEAT_THRESHOLD', 5
+        )
+        self.slow_ms = slow_ms or getattr(settings, 'QUERY_GUARD_SLOW_MS', 100)
+        self.queries = []
+        self._stack = None
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        for connection in connections.all():
+            self._stack.enter_context(
+                connection.execute_wrapper(self.wrapper(connection.alias))
+            )
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stack.close()
+
+    def wrapper(self, alias):
+        def execute(execute, sql, params, many, context):
+            if TRANSACTION_CONTROL.match(sql):
+                return execute(sql, params, many, context)
+            started = perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                self.queries.append(Query(
+                    alias, sql, tuple(params or ()), perf_counter() - started
+                ))
+        return execute
+
+    def repeated(self):
+        return [
+            (shape, count)
+            for shape, count in Counter(
+                query.shape for query in self.queries
+            ).most_common()
+            if count >= self.repeat_threshold
+        ]
+
+    def slow(self):
+        return [
+            query for query in self.queries
+            if query.duration * 1000 >= self.slow_ms
+        ]
+
+    def explain(self, query):
+        if not query.sql.lstrip().upper().startswith('SELECT'):
+            return ''
+        connection = connections[query.alias]
+        prefix = (
+            'EXPLAIN QUERY PLAN ' if connection.vendor == 'sqlite'
+            else 'EXPLAIN '
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(prefix + query.sql, query.params)
+            return '\n'.join(
+                ' '.join(str(column) for column in row)
+                for row in cursor.fetchall()
+            )
+
+    def problems(self):
+        problems = []
+        if self.budget is not None and len(self.queries) > self.budget:
+            problems.append(
+                f'{len(self.queries)} запросов при бюджете {self.budget}'
+            )
+        for shape, count in self.repeated():
+            problems.append(f'N+1: {count} раз {shape}')
+        for query in self.slow():
+            problems.append(
+                f'медленный запрос {query.duration * 1000:.0f} мс: '
+                f'{query.shape}\n{self.explain(query)}'
+            )
+        return problems
+
+
+class QueryBudgetTestMixin:
+    """Примесь к TestCase: падает, если блок нарушил бюджет запросов."""
+
+    @contextmanager
+    def assertQueryBudget(self, budget=None, **kwargs):
+        guard = QueryGuard(budget, **kwargs)
+        with guard:
+            yield guard
+        problems = guard.problems()
+        if problems:
+            self.fail('\n'.join(problems))
+
+    def assertRequestWithinBudget(self, method, path, **kwargs):
+        """Выполняет запрос клиентом с бюджетом из представления."""
+        budget = get_view_budget(resolve(path.split('?')[0]).func, method)
+        with self.assertQueryBudget(budget):
+            return getattr(self.client, method.lower())(path, **kwargs)
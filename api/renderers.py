@@ -0,0 +1,123 @@
+import gzip
+from decimal import Decimal
+
+from django.utils.cache import patch_vary_headers
+from rest_framework.renderers import JSONRenderer
+
+from products.constants import (
+    COMPRESSION_MIN_SIZE, GZIP_LEVEL, BROTLI_QUALITY
+)
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+LINE_SEPARATORS = (
+    ('\u2028'.encode(), b'\\u2028'),
+    ('\u2029'.encode(), b'\\u2029'),
+)
+
+
+def accepted_encodings(header):
+    encodings = set()
+    for item in header.split(','):
+        coding, _, params = item.strip().partition(';')
+        params = params.replace(' ', '')
+        if params.startswith('q='):
+            try:
+                if float(params[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        if coding:
+            encodings.add(coding.lower())
+    return encodings
+
+
+class ShopJSONRenderer(JSONRenderer):
+    """
+    JSON-рендерер на orjson (если установлен) со сжатием gzip/brotli.
+
+    Без orjson, при запросе с отступами (indent) и при STRICT_JSON=False
+    работает как стандартный JSONRenderer. Ключи словарей не-строки
+    приводятся к строкам. Decimal проверяется первым и, как в DRF,
+    выводится числом; даты, время и остальное кодирует энкодер DRF.
+
+    NaN и бесконечности orjson выводит как null. DRF в строгом режиме
+    на них падает, но отдельный обход данных для проверки обходится
+    дороже самого кодирования, а в ответах API нет float-полей (цены и
+    количества - Decimal).
+    """
+    compress_min_size = COMPRESSION_MIN_SIZE
+    gzip_level = GZIP_LEVEL
+    brotli_quality = BROTLI_QUALITY
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.encoder = self.encoder_class()
+
+    def default(self, obj):
+        if type(obj) is Decimal:
+            return float(obj)
+        return self.encoder.default(obj)
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        renderer_context = renderer_context or {}
+        indent = self.get_indent(accepted_media_type, renderer_context)
+
+        if (
+            orjson is None
+            or indent is not None
+            or data is None
+            or not self.strict
+        ):
+            ret = super().render(data, accepted_media_type, renderer_context)
+        else:
+            ret = orjson.dumps(
+                data,
+                default=self.default,
+                option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+            )
+            for separator, escaped in LINE_SEPARATORS:
+                if separator in ret:
+                    ret = ret.replace(separator, escaped)
+
+        response = renderer_context.get('response')
+        if (
+            response is None
+            or getattr(response, 'accepted_renderer', None) is not self
+            or len(ret) < self.compress_min_size
+            or response.has_header('Content-Encoding')
+        ):
+            return ret
+
+        encoding = self.get_content_encoding(renderer_context.get('request'))
+        if encoding is None:
+            return ret
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        response['Content-Encoding'] = encoding
+        return self.compress(ret, encoding)
+
+    def get_content_encoding(self, request):
+        if request is None:
+            return None
+        encodings = accepted_encodings(
+            request.META.get('HTTP_ACCEPT_ENCODING', '')
+        )
+        if brotli is not None and 'br' in encodings:
+            return 'br'
+        if 'gzip' in encodings:
+            return 'gzip'
+        return None
+
+    def compress(self, content, encoding):
+        if encoding == 'br':
+            return brotli.compress(content, quality=self.brotli_quality)
+        return gzip.compress(content, compresslevel=self.gzip_level, mtime=0)
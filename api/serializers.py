@@ -1,13 +1,74 @@
+from django.db.models import Count
 from rest_framework.exceptions import ValidationError
 from rest_framework.fields import SerializerMethodField, DecimalField
 from rest_framework.relations import PrimaryKeyRelatedField
 from rest_framework.serializers import ModelSerializer
 
-from products.constants import PRICE_LEN, SHOPPING_CART_MAX
-from products.models import Category, SubCategory, Product, ShoppingCart
+from products.constants import (
+    PRICE_LEN, SHOPPING_CART_MAX, FIELDS_QUERY_PARAM
+)
+from products.models import (
+    Category, SubCategory, Product, ShoppingCart, Order, OrderItem
+)
+
+
+def get_requested_fields(request):
+    if request is None:
+        return None
+    fields = request.query_params.get(FIELDS_QUERY_PARAM, '')
+    return {
+        field.strip() for field in fields.split(',') if field.strip()
+    } or None
+
+
+class SparseFieldsMixin:
+    """
+    Оставляет в выводе только поля из параметра ?fields=.
+
+    field_columns сопоставляет поле сериализатора со столбцами модели,
+    которые нужны для его вывода (по умолчанию - одноимённый столбец),
+    field_annotations - с аннотациями queryset, заменяющими запрос на
+    каждую строку.
+    """
+    field_columns = {}
+    field_annotations = {}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        requested = get_requested_fields(self.context.get('request'))
+        if requested:
+            for name in set(self.fields) - requested:
+                self.fields.pop(name)
+
+    @classmethod
+    def get_columns(cls, fields):
+        columns = []
+        for field in fields:
+            columns.extend(cls.field_columns.get(field, (field,)))
+        return columns
+
+    @classmethod
+    def get_annotations(cls, fields):
+        annotations = {}
+        for field in fields:
+            annotations.update(cls.field_annotations.get(field, {}))
+        return annotations
+
+
+class CategorySerializer(SparseFieldsMixin, ModelSerializer):
+    field_columns = {
+        'subcategory_count': (),
+        'product_count': (),
+    }
+    field_annotations = {
+        'subcategory_count': {
+            'subcategories_total': Count('subcategories', distinct=True)
+        },
+        'product_count': {
+            'products_total': Count('subcategories__products', distinct=True)
+        },
+    }
 
-
-class CategorySerializer(ModelSerializer):
     class Meta:
         model = Category
         fields = (
@@ -15,9 +76,17 @@ class CategorySerializer(ModelSerializer):
         )
 
 
-class SubCategorySerializer(ModelSerializer):
+class SubCategorySerializer(SparseFieldsMixin, ModelSerializer):
     parent_category = SerializerMethodField()
 
+    field_columns = {
+        'parent_category': ('parent_category__name',),
+        'product_count': (),
+    }
+    field_annotations = {
+        'product_count': {'products_total': Count('products')},
+    }
+
     class Meta:
         model = SubCategory
         fields = (
@@ -28,11 +97,17 @@ class SubCategorySerializer(ModelSerializer):
         return obj.parent_category.name if obj.parent_category else None
 
 
-class ProductSerializer(ModelSerializer):
+class ProductSerializer(SparseFieldsMixin, ModelSerializer):
     category = SerializerMethodField()
     subcategory = SerializerMethodField()
     images = SerializerMethodField()
 
+    field_columns = {
+        'category': ('category__name',),
+        'subcategory': ('subcategory__name',),
+        'images': ('image_small', 'image_medium', 'image_large'),
+    }
+
     class Meta:
         model = Product
         fields = (
@@ -101,15 +176,31 @@ class ShoppingCartSerializer(ModelSerializer):
         return ShoppingCart.objects.create(user=user, **validated_data)
 
     def get_total_product_price(self, obj):
-        return obj.product.price * obj.quantity
+        return obj.total_price()
 
     def get_products(self, obj):
         return [
             {
-                'product': obj.product.name,
-                'id': obj.product.id,
+                'product': obj.get_product_name(),
+                'id': obj.product_id,
                 'quantity': obj.quantity,
-                'product_price': obj.product.price,
+                'product_price': obj.product_price(),
                 'total_product_price': self.get_total_product_price(obj)
             }
         ]
+
+
+class OrderItemSerializer(ModelSerializer):
+    class Meta:
+        model = OrderItem
+        fields = (
+            'product', 'product_name', 'price', 'quantity', 'total_price'
+        )
+
+
+class OrderSerializer(ModelSerializer):
+    items = OrderItemSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Order
+        fields = ('id', 'created_at', 'total_price', 'items')
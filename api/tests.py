@@ -0,0 +1,316 @@
+import gzip
+import math
+from datetime import datetime, timezone
+from decimal import Decimal
+from unittest import mock, skipIf
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+
+from api import renderers
+from api.query_guard import QueryBudgetTestMixin, get_query_budget
+from api.renderers import ShopJSONRenderer
+from api.throttling import LocalBucketStore, get_bucket_store
+from api.views import (
+    CategoryViewSet, ProductCategoryViewSet, ShoppingCartViewSet,
+    SubCategoryViewSet
+)
+from products.constants import COMPRESSION_MIN_SIZE
+from products.models import (
+    Category, Order, Product, ShoppingCart, SubCategory
+)
+
+
+class ShopJSONRendererTests(TestCase):
+    def test_matches_drf_renderer(self):
+        data = {
+            1: 2,
+            'price': Decimal('11.05'),
+            'created': datetime(2024, 9, 10, 15, 40, tzinfo=timezone.utc),
+            'name': 'Продукт ',
+        }
+        self.assertEqual(
+            ShopJSONRenderer().render(data), JSONRenderer().render(data)
+        )
+
+    def test_non_finite_float_is_null(self):
+        self.assertEqual(
+            ShopJSONRenderer().render({'value': math.nan}), b'{"value":null}'
+        )
+
+
+class CompressionTests(APITestCase):
+    url = '/api/products/'
+
+    @classmethod
+    def setUpTestData(cls):
+        Product.objects.bulk_create(
+            Product(
+                name=f'Продукт {number}', slug=f'product-{number}',
+                price=Decimal('11.05')
+            )
+            for number in range(10)
+        )
+
+    def get(self, url=None, **headers):
+        return self.client.get(url or self.url, **headers)
+
+    def test_gzip(self):
+        response = self.get(HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(
+            gzip.decompress(response.content),
+            ShopJSONRenderer().render(response.data)
+        )
+
+    @skipIf(renderers.brotli is None, 'brotli не установлен')
+    def test_brotli_is_preferred(self):
+        response = self.get(HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+
+    def test_gzip_without_brotli(self):
+        with mock.patch.object(renderers, 'brotli', None):
+            response = self.get(HTTP_ACCEPT_ENCODING='br, gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+
+    def test_refused_encoding(self):
+        response = self.get(HTTP_ACCEPT_ENCODING='gzip;q=0')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_small_response_is_not_compressed(self):
+        response = self.get(
+            '/api/categories/', HTTP_ACCEPT_ENCODING='gzip'
+        )
+        self.assertLess(len(response.content), COMPRESSION_MIN_SIZE)
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_browsable_api_is_not_compressed(self):
+        response = self.get(
+            HTTP_ACCEPT='text/html', HTTP_ACCEPT_ENCODING='gzip'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['Content-Type'].startswith('text/html'))
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertIn(b'product-0', response.content)
+
+
+class SparseFieldsTests(QueryBudgetTestMixin, APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Category.objects.bulk_create(
+            Category(name=f'Категория {number}', slug=f'category-{number}')
+            for number in range(10)
+        )
+        Product.objects.create(
+            name='Продукт', slug='product', price=Decimal('11.05'),
+            subcategory=SubCategory.objects.create(
+                name='Подкатегория', slug='subcategory',
+                parent_category=Category.objects.first()
+            )
+        )
+
+    def get_product_select(self, guard):
+        return next(
+            query.sql for query in guard.queries
+            if 'FROM "products_product"' in query.sql
+            and 'COUNT(' not in query.sql
+        )
+
+    def test_all_fields_join_related(self):
+        with self.assertQueryBudget() as guard:
+            self.client.get('/api/products/')
+        self.assertIn('JOIN', self.get_product_select(guard))
+
+    def test_selected_fields_only(self):
+        with self.assertQueryBudget() as guard:
+            response = self.client.get('/api/products/?fields=slug,price')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data['results'], [{'slug': 'product', 'price': '11.05'}]
+        )
+        select = self.get_product_select(guard)
+        self.assertNotIn('JOIN', select)
+        self.assertNotIn('image_', select)
+        self.assertNotIn('"products_product"."name"', select)
+
+    def test_unknown_field(self):
+        response = self.client.get('/api/products/?fields=slug,secret')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('secret', str(response.data['fields']))
+
+    def test_empty_selection_returns_all_fields(self):
+        response = self.assertRequestWithinBudget(
+            'get', '/api/categories/?fields=,'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('product_count', response.data['results'][0])
+
+
+class QueryBudgetTests(QueryBudgetTestMixin, APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('buyer')
+        cls.token = Token.objects.create(user=cls.user)
+        for number in range(6):
+            category = Category.objects.create(
+                name=f'Категория {number}', slug=f'category-{number}'
+            )
+            subcategory = SubCategory.objects.create(
+                name=f'Подкатегория {number}', slug=f'subcategory-{number}',
+                parent_category=category
+            )
+            Product.objects.create(
+                name=f'Продукт {number}', slug=f'product-{number}',
+                price=Decimal('11.05'), subcategory=subcategory
+            )
+
+    def setUp(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def fill_cart(self):
+        for product in Product.objects.all():
+            ShoppingCart.objects.create(
+                user=self.user, product=product, quantity=Decimal('1.5')
+            )
+
+    def test_budgets(self):
+        self.assertEqual(get_query_budget(CategoryViewSet, 'list'), 3)
+        self.assertEqual(get_query_budget(ShoppingCartViewSet, 'list'), 4)
+        self.assertEqual(
+            get_query_budget(ShoppingCartViewSet, 'checkout'), 9
+        )
+
+    def test_catalogue_list(self):
+        for view_class, path in (
+            (CategoryViewSet, '/api/categories/'),
+            (SubCategoryViewSet, '/api/sub_categories/'),
+            (ProductCategoryViewSet, '/api/products/'),
+        ):
+            with self.subTest(path=path):
+                self.assertEqual(get_query_budget(view_class, 'list'), 3)
+                response = self.assertRequestWithinBudget('get', path)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertEqual(len(response.data['results']), 6)
+
+    def test_cart_list(self):
+        self.fill_cart()
+        response = self.assertRequestWithinBudget(
+            'get', '/api/shopping_cart/'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 6)
+
+    def test_checkout(self):
+        self.fill_cart()
+        response = self.assertRequestWithinBudget(
+            'post', '/api/shopping_cart/checkout/',
+            HTTP_IDEMPOTENCY_KEY='order-1'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data['items']), 6)
+
+    @override_settings(QUERY_GUARD_ENABLED=False)
+    def test_middleware_can_be_disabled(self):
+        response = self.client.get('/api/categories/')
+        self.assertFalse(hasattr(response.wsgi_request, 'query_guard'))
+
+
+class CheckoutTests(APITestCase):
+    url = '/api/shopping_cart/checkout/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('buyer')
+        cls.products = [
+            Product.objects.create(
+                name=f'Продукт {number}', slug=f'product-{number}',
+                price=Decimal('11.05')
+            )
+            for number in range(2)
+        ]
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def fill_cart(self):
+        for product in self.products:
+            ShoppingCart.objects.create(
+                user=self.user, product=product, quantity=Decimal('1.5')
+            )
+
+    def test_empty_cart(self):
+        response = self.client.post(self.url)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Order.objects.exists())
+
+    def test_order_lines_are_rounded_and_cart_cleared(self):
+        self.fill_cart()
+        response = self.client.post(self.url)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            [item['total_price'] for item in response.data['items']],
+            ['16.58', '16.58']
+        )
+        self.assertEqual(response.data['total_price'], '33.16')
+        self.assertFalse(ShoppingCart.objects.filter(user=self.user).exists())
+
+    def test_repeated_idempotency_key(self):
+        self.fill_cart()
+        first = self.client.post(self.url, HTTP_IDEMPOTENCY_KEY='order-1')
+        self.fill_cart()
+        repeated = self.client.post(self.url, HTTP_IDEMPOTENCY_KEY='order-1')
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(repeated.status_code, status.HTTP_200_OK)
+        self.assertEqual(repeated.data['id'], first.data['id'])
+        self.assertEqual(Order.objects.filter(user=self.user).count(), 1)
+
+
+@override_settings(REST_FRAMEWORK={
+    **settings.REST_FRAMEWORK,
+    'DEFAULT_THROTTLE_RATES': {'cart': '2/min', 'cart_write': '1/min'},
+})
+class TokenBucketThrottleTests(APITestCase):
+    url = '/api/shopping_cart/'
+
+    def setUp(self):
+        get_bucket_store.cache_clear()
+        self.client.force_authenticate(User.objects.create_user('buyer'))
+
+    def test_exhausted_bucket_returns_retry_after(self):
+        for _ in range(2):
+            self.assertEqual(
+                self.client.get(self.url).status_code, status.HTTP_200_OK
+            )
+        response = self.client.get(self.url)
+        self.assertEqual(
+            response.status_code, status.HTTP_429_TOO_MANY_REQUESTS
+        )
+        self.assertEqual(response['Retry-After'], '30')
+
+    def test_reads_and_writes_use_separate_buckets(self):
+        checkout = self.url + 'checkout/'
+        self.assertEqual(
+            self.client.post(checkout).status_code,
+            status.HTTP_400_BAD_REQUEST
+        )
+        self.assertEqual(
+            self.client.post(checkout).status_code,
+            status.HTTP_429_TOO_MANY_REQUESTS
+        )
+        self.assertEqual(
+            self.client.get(self.url).status_code, status.HTTP_200_OK
+        )
+
+
+class LocalBucketStoreTests(TestCase):
+    def test_prunes_least_recently_used_buckets(self):
+        store = LocalBucketStore(max_keys=3, prune_batch=2)
+        for key in ('a', 'b', 'c', 'a', 'd'):
+            store.consume(key, 1, 1, 0)
+        self.assertEqual(list(store._buckets), ['a', 'd'])
@@ -0,0 +1,196 @@
+import hashlib
+import itertools
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+class LocalBucketStore:
+    """
+    Хранит корзины токенов в памяти процесса.
+
+    Корзины лежат в словаре в порядке последнего обращения. При
+    достижении max_keys удаляются prune_batch самых давно использованных;
+    если такая корзина ещё не наполнилась, она начнётся заново полной.
+    """
+
+    def __init__(self, max_keys=100_000, prune_batch=1000):
+        self.max_keys = max_keys
+        self.prune_batch = prune_batch
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def consume(self, key, capacity, rate, now):
+        """
+        Забирает токен из корзины key.
+
+        Возвращает 0, если токен выдан, иначе сколько секунд ждать.
+        """
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (capacity, now))
+            tokens = min(capacity, tokens + max(0, now - updated) * rate)
+            wait = 0 if tokens >= 1 else (1 - tokens) / rate
+            if not wait:
+                tokens -= 1
+            if len(self._buckets) >= self.max_keys:
+                self._prune()
+            self._buckets[key] = (tokens, now)
+            return wait
+
+    def _prune(self):
+        for key in list(itertools.islice(self._buckets, self.prune_batch)):
+            del self._buckets[key]
+
+
+class SharedMemoryBucketStore:
+    """
+    Хранит корзины в общем для воркеров gunicorn файле, отображённом в
+    память.
+
+    Файл поделён на slots ячеек, ключ попадает в ячейку по хешу, ячейка
+    блокируется через fcntl. Если ключи совпали по ячейке, корзина
+    сбрасывается до полной.
+    """
+    slot = struct.Struct('Qdd')
+
+    def __init__(self, path=None, slots=65536):
+        if fcntl is None:
+            raise ImproperlyConfigured(
+                'SharedMemoryBucketStore работает только на POSIX-системах '
+                '(нужен модуль fcntl).'
+            )
+        path = path or os.path.join(
+            tempfile.gettempdir(), 'shop_throttle.buckets'
+        )
+        size = self.slot.size * slots
+        self.slots = slots
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        if os.fstat(self._fd).st_size < size:
+            os.ftruncate(self._fd, size)
+        self._map = mmap.mmap(self._fd, size)
+        self._lock = threading.Lock()
+
+    def consume(self, key, capacity, rate, now):
+        digest = int.from_bytes(
+            hashlib.blake2b(key.encode(), digest_size=8).digest(), 'little'
+        ) or 1
+        offset = digest % self.slots * self.slot.size
+
+        with self._lock:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, self.slot.size, offset)
+            try:
+                stored, tokens, updated = self.slot.unpack_from(
+                    self._map, offset
+                )
+                if stored != digest:
+                    tokens, updated = capacity, now
+                tokens = min(capacity, tokens + max(0, now - updated) * rate)
+                wait = 0 if tokens >= 1 else (1 - tokens) / rate
+                if not wait:
+                    tokens -= 1
+                self.slot.pack_into(self._map, offset, digest, tokens, now)
+                return wait
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, self.slot.size, offset)
+
+
+class RedisBucketStore:
+    """Хранит корзины в Redis, списание выполняется Lua-скриптом."""
+    script = """
+        local capacity = tonumber(ARGV[1])
+        local rate = tonumber(ARGV[2])
+        local now = tonumber(ARGV[3])
+        local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+        local tokens = tonumber(bucket[1]) or capacity
+        local updated = tonumber(bucket[2]) or now
+        tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+        local wait = 0
+        if tokens >= 1 then
+            tokens = tokens - 1
+        else
+            wait = (1 - tokens) / rate
+        end
+        redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+        redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+        return tostring(wait)
+    """
+
+    def __init__(self, url='redis://localhost:6379/0'):
+        import redis
+
+        self._consume = redis.Redis.from_url(url).register_script(
+            self.script
+        )
+
+    def consume(self, key, capacity, rate, now):
+        return float(self._consume(keys=[key], args=[capacity, rate, now]))
+
+
+@lru_cache
+def get_bucket_store():
+    config = getattr(settings, 'THROTTLE_BUCKET_STORE', {})
+    store_class = import_string(
+        config.get('BACKEND', 'api.throttling.LocalBucketStore')
+    )
+    return store_class(**config.get('OPTIONS', {}))
+
+
+@lru_cache
+def parse_rate(rate):
+    num, period = rate.split('/')
+    return int(num), int(num) / PERIODS[period[0]]
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Ограничивает запросы по алгоритму token bucket.
+
+    Лимит берётся из DEFAULT_THROTTLE_RATES по throttle_scope
+    представления, для изменяющих запросов - по write_throttle_scope,
+    если он задан. Ёмкость корзины равна числу запросов за период.
+    """
+    wait_time = 0
+
+    def get_scope(self, request, view):
+        scope = getattr(view, 'throttle_scope', None)
+        if request.method not in SAFE_METHODS:
+            return getattr(view, 'write_throttle_scope', None) or scope
+        return scope
+
+    def allow_request(self, request, view):
+        scope = self.get_scope(request, view)
+        rate = api_settings.DEFAULT_THROTTLE_RATES.get(scope)
+        if rate is None:
+            return True
+
+        capacity, per_second = parse_rate(rate)
+        if request.user and request.user.is_authenticated:
+            ident = request.user.pk
+        else:
+            ident = self.get_ident(request)
+
+        self.wait_time = get_bucket_store().consume(
+            f'throttle:{scope}:{ident}', capacity, per_second, time.time()
+        )
+        return not self.wait_time
+
+    def wait(self):
+        return self.wait_time
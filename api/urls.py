@@ -1,9 +1,9 @@
-from django.urls import include, path
+from django.urls import include, path, re_path
 from rest_framework.routers import DefaultRouter
 
 from .views import (
     CategoryViewSet, SubCategoryViewSet, ProductCategoryViewSet,
-    ShoppingCartViewSet
+    ShoppingCartViewSet, lazy_view
 )
 
 app_name = 'api'
@@ -16,6 +16,15 @@ router.register('products', ProductCategoryViewSet)
 router.register('shopping_cart', ShoppingCartViewSet)
 
 urlpatterns = [
-    path('auth/', include('djoser.urls.authtoken')),
+    re_path(
+        r'^auth/token/login/?$',
+        lazy_view('djoser.views.TokenCreateView', throttle_scope='auth'),
+        name='login'
+    ),
+    re_path(
+        r'^auth/token/logout/?$',
+        lazy_view('djoser.views.TokenDestroyView'),
+        name='logout'
+    ),
     path('', include(router.urls)),
 ]
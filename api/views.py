@@ -1,40 +1,104 @@
 from decimal import Decimal
+from functools import lru_cache
 
+from django.utils.module_loading import import_string
+from django.views.decorators.csrf import csrf_exempt
 from rest_framework import status
 from rest_framework.decorators import action
-from rest_framework.exceptions import NotFound
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.response import Response
 from rest_framework.viewsets import ReadOnlyModelViewSet, ModelViewSet
 
 from api.pagination import ShopPagination
 from api.serializers import (
     CategorySerializer, SubCategorySerializer, ProductSerializer,
-    ShoppingCartSerializer
+    ShoppingCartSerializer, OrderSerializer, get_requested_fields
 )
-from products.constants import SHOPPING_CART_MAX
-from products.models import Category, SubCategory, Product, ShoppingCart
+from products.constants import (
+    SHOPPING_CART_MAX, FIELDS_QUERY_PARAM, IDEMPOTENCY_KEY_LEN
+)
+from products.models import (
+    Category, SubCategory, Product, ShoppingCart, Order
+)
+from shop_project.routers import use_primary
 from .permissions import IsAuthor
 
 
-class CategoryViewSet(ReadOnlyModelViewSet):
+class SparseFieldsViewSetMixin:
+    """
+    Выбирает из БД только столбцы, связи и аннотации, нужные
+    запрошенным полям.
+    """
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        serializer_class = self.get_serializer_class()
+        available = set(serializer_class.Meta.fields)
+        requested = get_requested_fields(self.request)
+
+        if requested is None:
+            requested = available
+        unknown = ', '.join(sorted(requested - available))
+        if unknown:
+            raise ValidationError(
+                {FIELDS_QUERY_PARAM: f'Неизвестные поля: {unknown}.'}
+            )
+
+        columns = serializer_class.get_columns(requested)
+        related = {
+            column.split('__')[0] for column in columns if '__' in column
+        }
+        return queryset.select_related(*related).only(*columns).annotate(
+            **serializer_class.get_annotations(requested)
+        )
+
+
+def lazy_view(view_path, **attrs):
+    """
+    Импортирует класс представления только при первом запросе к нему.
+
+    djoser.views тянет за собой django.test, поэтому его импорт
+    откладывается с запуска воркера до первого входа.
+    """
+    @lru_cache
+    def get_view():
+        view_class = import_string(view_path)
+        if attrs:
+            view_class = type(view_class.__name__, (view_class,), attrs)
+        return view_class.as_view()
+
+    @csrf_exempt
+    def view(request, *args, **kwargs):
+        return get_view()(request, *args, **kwargs)
+
+    return view
+
+
+class CategoryViewSet(SparseFieldsViewSetMixin, ReadOnlyModelViewSet):
     pagination_class = ShopPagination
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     http_method_names = ['get']
+    throttle_scope = 'catalogue'
+    query_budget = 3
 
 
-class SubCategoryViewSet(ReadOnlyModelViewSet):
+class SubCategoryViewSet(SparseFieldsViewSetMixin, ReadOnlyModelViewSet):
     pagination_class = ShopPagination
     queryset = SubCategory.objects.all()
     serializer_class = SubCategorySerializer
     http_method_names = ['get']
+    throttle_scope = 'catalogue'
+    query_budget = 3
 
 
-class ProductCategoryViewSet(ReadOnlyModelViewSet):
+class ProductCategoryViewSet(SparseFieldsViewSetMixin, ReadOnlyModelViewSet):
     pagination_class = ShopPagination
     queryset = Product.objects.all()
     serializer_class = ProductSerializer
     http_method_names = ['get']
+    throttle_scope = 'catalogue'
+    query_budget = 3
 
 
 class ShoppingCartViewSet(ModelViewSet):
@@ -42,6 +106,13 @@ class ShoppingCartViewSet(ModelViewSet):
     permission_classes = (IsAuthor,)
     serializer_class = ShoppingCartSerializer
     http_method_names = ['get', 'post', 'patch', 'delete']
+    throttle_scope = 'cart'
+    write_throttle_scope = 'cart_write'
+    query_budget = 4
+    query_budgets = {'checkout': 9}
+
+    def get_queryset(self):
+        return super().get_queryset().filter(user=self.request.user)
 
     def list(self, request, *args, **kwargs):
         response = super().list(request, *args, **kwargs)
@@ -71,7 +142,8 @@ class ShoppingCartViewSet(ModelViewSet):
         }
 
         serializer = ShoppingCartSerializer(data=data, context=context)
-        serializer.is_valid(raise_exception=True)
+        with use_primary():
+            serializer.is_valid(raise_exception=True)
 
         try:
             instance = ShoppingCart.objects.get(
@@ -95,8 +167,8 @@ class ShoppingCartViewSet(ModelViewSet):
         except ShoppingCart.DoesNotExist:
             instance = ShoppingCart.objects.create(
                 user=request.user,
-                product=Product.objects.get(pk=request.data.get('product')),
-                quantity=request.data.get('quantity')
+                product=serializer.validated_data['product'],
+                quantity=serializer.validated_data['quantity']
             )
 
         serializer = self.get_serializer(instance)
@@ -168,3 +240,29 @@ class ShoppingCartViewSet(ModelViewSet):
             {'detail': 'Корзина очищена.'},
             status=status.HTTP_204_NO_CONTENT
         )
+
+    @action(detail=False, methods=['post'], url_path='checkout')
+    def checkout(self, request):
+        idempotency_key = request.headers.get('Idempotency-Key')
+        if idempotency_key and len(idempotency_key) > IDEMPOTENCY_KEY_LEN:
+            return Response(
+                {
+                    'detail': f'Ключ идемпотентности должен быть не длиннее '
+                              f'{IDEMPOTENCY_KEY_LEN} символов.'
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        order, created = Order.objects.checkout(
+            request.user, idempotency_key
+        )
+        if order is None:
+            return Response(
+                {'detail': 'Корзина пуста.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return Response(
+            OrderSerializer(order).data,
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK
+        )
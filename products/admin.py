@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import Category, SubCategory, Product
+from .models import Category, SubCategory, Product, Order, OrderItem
 
 
 @admin.register(Category)
@@ -35,3 +35,24 @@ class ProductAdmin(admin.ModelAdmin):
         'subcategory'
     )
     list_filter = ('name', 'slug', 'price', 'subcategory')
+
+
+class OrderItemInline(admin.TabularInline):
+    model = OrderItem
+    extra = 0
+    readonly_fields = (
+        'product', 'product_name', 'price', 'quantity', 'total_price'
+    )
+
+
+@admin.register(Order)
+class OrderAdmin(admin.ModelAdmin):
+    list_display = (
+        'id',
+        'user',
+        'total_price',
+        'created_at'
+    )
+    list_filter = ('created_at',)
+    readonly_fields = ('user', 'total_price', 'created_at')
+    inlines = (OrderItemInline,)
@@ -10,3 +10,11 @@ PRICE_MAX = Decimal(9999)
 PRICE_LEN = len(str(PRICE_MAX)) + 2
 SHOPPING_CART_MAX = 999
 PAGE_SIZE = 10
+COMPRESSION_MIN_SIZE = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4
+FIELDS_QUERY_PARAM = 'fields'
+ORDER_PRICE_LEN = 12
+IDEMPOTENCY_KEY_LEN = 64
+MULTIPLIER_LEN = 20
+MULTIPLIER_DECIMAL_PLACES = 10
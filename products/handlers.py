@@ -0,0 +1,16 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .models import Product, ShoppingCart
+from .signals import prices_changed
+
+
+@receiver(prices_changed)
+def sync_cart_prices(sender, product_ids, **kwargs):
+    ShoppingCart.objects.filter(product__in=product_ids).sync_snapshots()
+
+
+@receiver(post_save, sender=Product)
+def sync_cart_product(sender, instance, created, **kwargs):
+    if not created:
+        ShoppingCart.objects.filter(product=instance).sync_snapshots()
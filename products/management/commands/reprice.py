@@ -0,0 +1,52 @@
+from argparse import ArgumentTypeError
+from decimal import Decimal, InvalidOperation
+
+from django.core.management.base import BaseCommand, CommandError
+
+from products.models import Category, SubCategory, Product
+
+
+def finite_decimal(value):
+    try:
+        number = Decimal(value)
+    except InvalidOperation:
+        number = None
+    if number is None or not number.is_finite():
+        raise ArgumentTypeError(f'"{value}" - не конечное десятичное число.')
+    return number
+
+
+class Command(BaseCommand):
+    help = (
+        'Пакетно меняет цены продуктов категории или подкатегории '
+        'на процент (--percent) или на сумму (--amount).'
+    )
+
+    def add_arguments(self, parser):
+        target = parser.add_mutually_exclusive_group(required=True)
+        target.add_argument('--category', help='Слаг категории')
+        target.add_argument('--subcategory', help='Слаг подкатегории')
+        change = parser.add_mutually_exclusive_group(required=True)
+        change.add_argument('--percent', type=finite_decimal)
+        change.add_argument('--amount', type=finite_decimal)
+
+    def handle(self, *args, **options):
+        if options['category']:
+            model, slug, lookup = Category, options['category'], 'category'
+        else:
+            model, slug, lookup = (
+                SubCategory, options['subcategory'], 'subcategory'
+            )
+
+        try:
+            target = model.objects.get(slug=slug)
+        except model.DoesNotExist:
+            raise CommandError(
+                f'{model._meta.verbose_name.capitalize()} "{slug}" не найдена.'
+            )
+
+        updated = Product.objects.filter(**{lookup: target}).reprice(
+            percent=options['percent'],
+            amount=options['amount']
+        )
+        self.stdout.write(f'Изменено цен: {updated}')
@@ -0,0 +1,52 @@
+# Generated by Django 5.1 on 2026-10-19 10:55
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Order',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('idempotency_key', models.CharField(blank=True, editable=False, max_length=64, null=True, verbose_name='Ключ идемпотентности')),
+                ('total_price', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='Сумма')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата оформления')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'заказ',
+                'verbose_name_plural': 'Заказы',
+                'ordering': ['-created_at'],
+                'default_related_name': 'orders',
+            },
+        ),
+        migrations.CreateModel(
+            name='OrderItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('product_name', models.CharField(max_length=256, verbose_name='Название')),
+                ('price', models.DecimalField(decimal_places=2, max_digits=6, verbose_name='Цена')),
+                ('quantity', models.DecimalField(decimal_places=1, max_digits=6, verbose_name='Кол-во')),
+                ('total_price', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='Сумма')),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='products.order', verbose_name='Заказ')),
+                ('product', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='order_items', to='products.product', verbose_name='Продукт')),
+            ],
+            options={
+                'verbose_name': 'позицию заказа',
+                'verbose_name_plural': 'Позиции заказов',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='order',
+            constraint=models.UniqueConstraint(fields=('user', 'idempotency_key'), name='unique_order_idempotency_key'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.1 on 2026-10-19 11:04
+
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery
+from django.db.models.functions import Round
+
+
+def fill_snapshots(apps, schema_editor):
+    Product = apps.get_model('products', 'Product')
+    ShoppingCart = apps.get_model('products', 'ShoppingCart')
+    product = Product.objects.filter(pk=OuterRef('product'))
+    price = Subquery(product.values('price')[:1])
+    ShoppingCart.objects.update(
+        product_name=Subquery(product.values('name')[:1]),
+        unit_price=price,
+        line_total=Round(
+            price * F('quantity'), 2,
+            output_field=models.DecimalField(max_digits=12, decimal_places=2)
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0002_order_orderitem'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='shoppingcart',
+            name='line_total',
+            field=models.DecimalField(decimal_places=2, editable=False, max_digits=12, null=True, verbose_name='Сумма строки'),
+        ),
+        migrations.AddField(
+            model_name='shoppingcart',
+            name='product_name',
+            field=models.CharField(blank=True, editable=False, max_length=256, verbose_name='Название продукта'),
+        ),
+        migrations.AddField(
+            model_name='shoppingcart',
+            name='unit_price',
+            field=models.DecimalField(decimal_places=2, editable=False, max_digits=6, null=True, verbose_name='Цена за единицу'),
+        ),
+        migrations.RunPython(fill_snapshots, migrations.RunPython.noop),
+    ]
@@ -1,13 +1,25 @@
+from decimal import Decimal, ROUND_HALF_UP
+
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator, MaxValueValidator
-from django.db import models
-from django.db.models import UniqueConstraint
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, models, transaction
+from django.db.models import (
+    UniqueConstraint, F, Value, DecimalField, OuterRef, Subquery
+)
+from django.db.models.functions import Greatest, Least, Round
 
 from .constants import (
     CATEGORY_NAME_LEN, CATEGORY_SLUG_LEN, SUBCATEGORY_NAME_LEN,
     SUBCATEGORY_SLUG_LEN, PRODUCT_NAME_LEN, PRODUCT_SLUG_LEN, PRICE_MAX,
-    PRICE_LEN, SHOPPING_CART_MAX
+    PRICE_LEN, SHOPPING_CART_MAX, ORDER_PRICE_LEN, IDEMPOTENCY_KEY_LEN,
+    MULTIPLIER_LEN, MULTIPLIER_DECIMAL_PLACES
 )
+from .signals import prices_changed
+
+
+def round_price(value):
+    """Округляет сумму до копеек, половина - от нуля, как ROUND в SQL."""
+    return value.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
 
 
 class Category(models.Model):
@@ -27,10 +39,14 @@ class Category(models.Model):
     )
 
     def subcategory_count(self):
+        if hasattr(self, 'subcategories_total'):
+            return self.subcategories_total
         return self.subcategories.count()
     subcategory_count.short_description = 'Количество подкатегорий в категории'
 
     def product_count(self):
+        if hasattr(self, 'products_total'):
+            return self.products_total
         return Product.objects.filter(
             subcategory__parent_category=self
         ).count()
@@ -68,6 +84,8 @@ class SubCategory(models.Model):
     )
 
     def product_count(self):
+        if hasattr(self, 'products_total'):
+            return self.products_total
         return self.products.count()
     product_count.short_description = 'Количество продуктов в подкатегории'
 
@@ -79,6 +97,61 @@ class SubCategory(models.Model):
         return self.name
 
 
+class ProductQuerySet(models.QuerySet):
+    def reprice(self, percent=None, amount=None):
+        """
+        Меняет цену всех продуктов выборки одним UPDATE.
+
+        percent - изменение в процентах, amount - абсолютное изменение.
+        После фиксации транзакции отправляет один сигнал prices_changed
+        со списком изменённых продуктов и владельцев затронутых корзин.
+        """
+        if (percent is None) == (amount is None):
+            raise ValueError('Укажите либо percent, либо amount.')
+
+        output_field = DecimalField(max_digits=PRICE_LEN, decimal_places=2)
+        if percent is not None:
+            price = F('price') * Value(
+                1 + Decimal(percent) / 100,
+                output_field=DecimalField(
+                    max_digits=MULTIPLIER_LEN,
+                    decimal_places=MULTIPLIER_DECIMAL_PLACES
+                )
+            )
+        else:
+            price = F('price') + Value(
+                Decimal(amount), output_field=output_field
+            )
+        price = Greatest(
+            Least(
+                Round(price, 2, output_field=output_field),
+                Value(PRICE_MAX, output_field=output_field)
+            ),
+            Value(0, output_field=output_field)
+        )
+
+        with transaction.atomic():
+            product_ids = list(self.values_list('pk', flat=True))
+            if not product_ids:
+                return 0
+            user_ids = list(
+                ShoppingCart.objects.filter(
+                    product__in=product_ids
+                ).values_list('user', flat=True).distinct()
+            )
+            updated = Product.objects.filter(pk__in=product_ids).update(
+                price=price
+            )
+            transaction.on_commit(
+                lambda: prices_changed.send(
+                    sender=Product,
+                    product_ids=product_ids,
+                    user_ids=user_ids
+                )
+            )
+        return updated
+
+
 class Product(models.Model):
     name = models.CharField('Название', max_length=PRODUCT_NAME_LEN)
     slug = models.SlugField(
@@ -129,6 +202,8 @@ class Product(models.Model):
         on_delete=models.SET_NULL
     )
 
+    objects = ProductQuerySet.as_manager()
+
     def save(self, *args, **kwargs):
         if self.subcategory:
             self.category = self.subcategory.parent_category
@@ -143,6 +218,26 @@ class Product(models.Model):
         return self.name
 
 
+class ShoppingCartQuerySet(models.QuerySet):
+    def sync_snapshots(self):
+        """
+        Обновляет название, цену и сумму строк корзины из Product
+        одним UPDATE. Сумма округляется так же, как в round_price.
+        """
+        product = Product.objects.filter(pk=OuterRef('product'))
+        price = Subquery(product.values('price')[:1])
+        return self.update(
+            product_name=Subquery(product.values('name')[:1]),
+            unit_price=price,
+            line_total=Round(
+                price * F('quantity'), 2,
+                output_field=DecimalField(
+                    max_digits=ORDER_PRICE_LEN, decimal_places=2
+                )
+            )
+        )
+
+
 class ShoppingCart(models.Model):
     user = models.ForeignKey(
         User,
@@ -169,13 +264,54 @@ class ShoppingCart(models.Model):
             )
         ]
     )
+    product_name = models.CharField(
+        'Название продукта',
+        max_length=PRODUCT_NAME_LEN,
+        blank=True,
+        editable=False
+    )
+    unit_price = models.DecimalField(
+        'Цена за единицу',
+        max_digits=PRICE_LEN,
+        decimal_places=2,
+        null=True,
+        editable=False
+    )
+    line_total = models.DecimalField(
+        'Сумма строки',
+        max_digits=ORDER_PRICE_LEN,
+        decimal_places=2,
+        null=True,
+        editable=False
+    )
+
+    objects = ShoppingCartQuerySet.as_manager()
+
+    def save(self, *args, **kwargs):
+        if self.unit_price is None or not self.product_name:
+            product = self.product
+            if product._state.db != DEFAULT_DB_ALIAS:
+                product = Product.objects.using(DEFAULT_DB_ALIAS).only(
+                    'name', 'price'
+                ).get(pk=self.product_id)
+            self.product_name = product.name
+            self.unit_price = product.price
+        self.line_total = round_price(self.unit_price * self.quantity)
+        super().save(*args, **kwargs)
+
+    def get_product_name(self):
+        return self.product_name or self.product.name
 
     def product_price(self):
-        return self.product.price
+        if self.unit_price is None:
+            return self.product.price
+        return self.unit_price
     product_price.short_description = 'Цена'
 
     def total_price(self):
-        return self.product.price * self.quantity
+        if self.line_total is None:
+            return round_price(self.product.price * self.quantity)
+        return self.line_total
     total_price.short_description = 'Сумма'
 
     class Meta:
@@ -192,5 +328,149 @@ class ShoppingCart(models.Model):
     def __str__(self):
         return (
             f'Ячейка корзины {self.user.username}'
-            f' с продуктом  "{self.product}"'
+            f' с продуктом  "{self.get_product_name()}"'
         )
+
+
+class OrderQuerySet(models.QuerySet):
+    def checkout(self, user, idempotency_key=None):
+        """
+        Оформляет заказ из корзины пользователя.
+
+        Строки корзины и их продукты блокируются одним SELECT ... FOR
+        UPDATE, цены фиксируются в строках заказа, корзина очищается в той
+        же транзакции. Возвращает (заказ, создан ли он); (None, False) -
+        если корзина пуста. Повтор с тем же idempotency_key возвращает
+        уже оформленный заказ.
+        """
+        idempotency_key = idempotency_key or None
+        if idempotency_key:
+            order = self.filter(
+                user=user, idempotency_key=idempotency_key
+            ).first()
+            if order:
+                return order, False
+
+        try:
+            with transaction.atomic():
+                cart = list(
+                    ShoppingCart.objects.select_for_update()
+                    .select_related('product')
+                    .filter(user=user)
+                    .order_by('product_id')
+                )
+                if idempotency_key:
+                    order = self.filter(
+                        user=user, idempotency_key=idempotency_key
+                    ).first()
+                    if order:
+                        return order, False
+                if not cart:
+                    return None, False
+
+                items = [
+                    OrderItem(
+                        product=line.product,
+                        product_name=line.product.name,
+                        price=line.product.price,
+                        quantity=line.quantity,
+                        total_price=round_price(
+                            line.product.price * line.quantity
+                        )
+                    )
+                    for line in cart
+                ]
+                order = self.create(
+                    user=user,
+                    idempotency_key=idempotency_key,
+                    total_price=sum(item.total_price for item in items)
+                )
+                for item in items:
+                    item.order = order
+                OrderItem.objects.bulk_create(items)
+                ShoppingCart.objects.filter(
+                    pk__in=[line.pk for line in cart]
+                ).delete()
+        except IntegrityError:
+            if idempotency_key is None:
+                raise
+            return self.get(user=user, idempotency_key=idempotency_key), False
+
+        return order, True
+
+
+class Order(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name='Пользователь'
+    )
+    idempotency_key = models.CharField(
+        'Ключ идемпотентности',
+        max_length=IDEMPOTENCY_KEY_LEN,
+        null=True,
+        blank=True,
+        editable=False
+    )
+    total_price = models.DecimalField(
+        'Сумма',
+        max_digits=ORDER_PRICE_LEN,
+        decimal_places=2
+    )
+    created_at = models.DateTimeField('Дата оформления', auto_now_add=True)
+
+    objects = OrderQuerySet.as_manager()
+
+    class Meta:
+        default_related_name = 'orders'
+        ordering = ['-created_at']
+        verbose_name = 'заказ'
+        verbose_name_plural = 'Заказы'
+        constraints = [
+            UniqueConstraint(
+                fields=['user', 'idempotency_key'],
+                name='unique_order_idempotency_key'
+            )
+        ]
+
+    def __str__(self):
+        return f'Заказ №{self.pk} пользователя {self.user.username}'
+
+
+class OrderItem(models.Model):
+    order = models.ForeignKey(
+        Order,
+        on_delete=models.CASCADE,
+        related_name='items',
+        verbose_name='Заказ'
+    )
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='order_items',
+        verbose_name='Продукт'
+    )
+    product_name = models.CharField('Название', max_length=PRODUCT_NAME_LEN)
+    price = models.DecimalField(
+        'Цена',
+        max_digits=PRICE_LEN,
+        decimal_places=2
+    )
+    quantity = models.DecimalField(
+        'Кол-во',
+        max_digits=PRICE_LEN,
+        decimal_places=1
+    )
+    total_price = models.DecimalField(
+        'Сумма',
+        max_digits=ORDER_PRICE_LEN,
+        decimal_places=2
+    )
+
+    class Meta:
+        verbose_name = 'позицию заказа'
+        verbose_name_plural = 'Позиции заказов'
+
+    def __str__(self):
+        return f'{self.product_name} x {self.quantity}'
@@ -0,0 +1,6 @@
+from django.dispatch import Signal
+
+# Отправляется один раз на пакетное изменение цен.
+# Аргументы: product_ids - изменённые продукты,
+# user_ids - пользователи, у которых эти продукты лежат в корзине.
+prices_changed = Signal()
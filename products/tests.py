@@ -0,0 +1,101 @@
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from .models import Category, Product, ShoppingCart
+from .signals import prices_changed
+
+
+class RepriceTests(TestCase):
+    def setUp(self):
+        self.product = Product.objects.create(
+            name='Продукт', slug='product', price=Decimal('11.05')
+        )
+
+    def test_percent_keeps_fractional_multiplier(self):
+        Product.objects.filter(pk=self.product.pk).reprice(percent='12.5')
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.price, Decimal('12.43'))
+
+    def test_price_is_clamped(self):
+        Product.objects.filter(pk=self.product.pk).reprice(amount=-20)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.price, Decimal('0'))
+
+    def test_sends_one_batched_signal(self):
+        other = Product.objects.create(
+            name='Другой', slug='other', price=Decimal('5')
+        )
+        untouched = Product.objects.create(
+            name='Третий', slug='untouched', price=Decimal('5')
+        )
+        buyers = [User.objects.create_user(f'buyer-{n}') for n in range(3)]
+        for buyer, product in zip(buyers, (self.product, other, untouched)):
+            ShoppingCart.objects.create(
+                user=buyer, product=product, quantity=Decimal('1')
+            )
+
+        received = []
+
+        def receiver(sender, **kwargs):
+            received.append(kwargs)
+
+        prices_changed.connect(receiver)
+        self.addCleanup(prices_changed.disconnect, receiver)
+        with self.captureOnCommitCallbacks(execute=True):
+            updated = Product.objects.filter(
+                pk__in=[self.product.pk, other.pk]
+            ).reprice(percent=10)
+
+        self.assertEqual(updated, 2)
+        self.assertEqual(len(received), 1)
+        self.assertCountEqual(
+            received[0]['product_ids'], [self.product.pk, other.pk]
+        )
+        self.assertCountEqual(
+            received[0]['user_ids'], [buyers[0].pk, buyers[1].pk]
+        )
+
+
+class RepriceCommandTests(TestCase):
+    def test_rejects_non_finite_values(self):
+        Category.objects.create(name='Категория', slug='category')
+        for value in ('abc', 'NaN', 'Infinity'):
+            with self.subTest(value=value):
+                with self.assertRaises(CommandError):
+                    call_command(
+                        'reprice', '--category', 'category',
+                        '--percent', value
+                    )
+
+
+class ShoppingCartSnapshotTests(TestCase):
+    def test_save_and_sync_round_alike(self):
+        user = User.objects.create_user('buyer')
+        product = Product.objects.create(
+            name='Продукт', slug='product', price=Decimal('11.05')
+        )
+        line = ShoppingCart.objects.create(
+            user=user, product=product, quantity=Decimal('1.5')
+        )
+        saved_total = line.line_total
+
+        ShoppingCart.objects.filter(pk=line.pk).sync_snapshots()
+        line.refresh_from_db()
+        self.assertEqual(saved_total, Decimal('16.58'))
+        self.assertEqual(line.line_total, saved_total)
+
+    def test_snapshot_is_read_from_primary(self):
+        user = User.objects.create_user('buyer')
+        product = Product.objects.create(
+            name='Продукт', slug='product', price=Decimal('10')
+        )
+        product.name, product.price = 'Устаревшее', Decimal('1')
+        product._state.db = 'replica_0'
+        line = ShoppingCart.objects.create(
+            user=user, product=product, quantity=Decimal('2')
+        )
+        self.assertEqual(line.product_name, 'Продукт')
+        self.assertEqual(line.line_total, Decimal('20.00'))
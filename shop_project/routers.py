@@ -0,0 +1,177 @@
+import hashlib
+import itertools
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+NOT_CHOSEN = ''
+
+_use_primary = ContextVar('use_primary', default=False)
+_current_replica = ContextVar('current_replica', default=None)
+
+
+@contextmanager
+def use_primary():
+    """Направляет все чтения внутри блока в основную БД."""
+    token = _use_primary.set(True)
+    try:
+        yield
+    finally:
+        _use_primary.reset(token)
+
+
+class ReplicaRouter:
+    """
+    Читает каталог (категории, подкатегории, продукты) с реплик по кругу.
+
+    В пределах HTTP-запроса используется одна реплика, вне запроса
+    (shell, команды, потоки) она выбирается заново для каждого чтения.
+    Остальные модели, все записи и чтения внутри транзакции идут в
+    основную БД.
+
+    Проверка реплики читает таблицы каталога, поэтому пустая или
+    отстающая без схемы реплика считается нерабочей. Такая реплика
+    пропускается до следующей проверки через REPLICA_HEALTH_CHECK_INTERVAL
+    секунд; если рабочих реплик нет, чтение идёт в основную БД.
+    """
+    catalogue_models = {
+        ('products', 'category'),
+        ('products', 'subcategory'),
+        ('products', 'product'),
+    }
+
+    def __init__(self):
+        self.replicas = list(getattr(settings, 'DATABASE_REPLICAS', []))
+        self.health_check_interval = getattr(
+            settings, 'REPLICA_HEALTH_CHECK_INTERVAL', 10
+        )
+        self._replica_cycle = itertools.cycle(self.replicas)
+        self._health = {}
+
+    def db_for_read(self, model, **hints):
+        if (
+            not self.replicas
+            or (model._meta.app_label, model._meta.model_name)
+            not in self.catalogue_models
+            or _use_primary.get()
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+
+        alias = _current_replica.get()
+        if alias is None:
+            return self.choose_replica()
+        if alias == NOT_CHOSEN:
+            alias = self.choose_replica()
+            _current_replica.set(alias)
+        return alias
+
+    def choose_replica(self):
+        for _ in self.replicas:
+            alias = next(self._replica_cycle)
+            if self.is_healthy(alias):
+                return alias
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return None
+
+    def get_catalogue_tables(self):
+        return sorted(
+            apps.get_model(app_label, model_name)._meta.db_table
+            for app_label, model_name in self.catalogue_models
+        )
+
+    def is_healthy(self, alias):
+        healthy, checked_at = self._health.get(alias, (True, None))
+        now = time.monotonic()
+        if (
+            checked_at is not None
+            and now - checked_at < self.health_check_interval
+        ):
+            return healthy
+
+        connection = connections[alias]
+        probes = ', '.join(
+            f'(SELECT 1 FROM {connection.ops.quote_name(table)} LIMIT 1)'
+            for table in self.get_catalogue_tables()
+        )
+        try:
+            connection.ensure_connection()
+            # Курсор драйвера: проверка не попадает в бюджет запросов
+            cursor = connection.connection.cursor()
+            try:
+                cursor.execute(f'SELECT {probes}')
+            finally:
+                cursor.close()
+            healthy = True
+        except (DatabaseError, connection.Database.Error):
+            healthy = False
+        self._health[alias] = (healthy, now)
+        return healthy
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Выбирает реплику заново для каждого запроса.
+
+    После успешной записи клиент на REPLICA_PIN_SECONDS секунд читает
+    только из основной БД, чтобы сразу видеть свои изменения. Клиент
+    определяется по токену из заголовка Authorization или по сессии.
+    Метки хранятся в кеше REPLICA_PIN_CACHE, общем для всех воркеров,
+    поэтому кеш в памяти процесса не подходит.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.pin_seconds = getattr(settings, 'REPLICA_PIN_SECONDS', 5)
+        self.cache = caches[
+            getattr(settings, 'REPLICA_PIN_CACHE', DEFAULT_CACHE_ALIAS)
+        ]
+        if isinstance(self.cache, (LocMemCache, DummyCache)):
+            raise ImproperlyConfigured(
+                'REPLICA_PIN_CACHE должен указывать на кеш, общий для всех '
+                'воркеров (файловый, Redis, Memcached).'
+            )
+
+    def __call__(self, request):
+        key = self.get_pin_key(request)
+        pin_token = _use_primary.set(bool(key and self.cache.get(key)))
+        replica_token = _current_replica.set(NOT_CHOSEN)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_replica.reset(replica_token)
+            _use_primary.reset(pin_token)
+
+        if (
+            key
+            and request.method not in SAFE_METHODS
+            and response.status_code < 400
+        ):
+            self.cache.set(key, True, self.pin_seconds)
+        return response
+
+    def get_pin_key(self, request):
+        client = request.headers.get('Authorization') or (
+            request.session.session_key
+            if hasattr(request, 'session') else None
+        )
+        if not client:
+            return None
+        return 'primary-pin:' + hashlib.sha256(client.encode()).hexdigest()
@@ -1,4 +1,5 @@
 import os
+import tempfile
 from pathlib import Path
 
 from django.core.management.utils import get_random_secret_key
@@ -37,6 +38,8 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'shop_project.routers.ReplicaRoutingMiddleware',
+    'api.middleware.QueryBudgetMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -65,9 +68,57 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # Писатели ждут блокировку, а не падают с "database is locked"
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
     }
 }
 
+# Реплики для чтения каталога: REPLICA_DB_NAMES=replica1.sqlite3,replica2.sqlite3
+DATABASE_REPLICAS = []
+for index, name in enumerate(
+    filter(None, os.getenv('REPLICA_DB_NAMES', '').split(','))
+):
+    alias = f'replica_{index}'
+    # Только чтение: опечатка в имени не создаст пустую реплику
+    DATABASES[alias] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': (BASE_DIR / name.strip()).as_uri() + '?mode=ro',
+        'OPTIONS': {'timeout': 20},
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['shop_project.routers.ReplicaRouter']
+
+REPLICA_PIN_SECONDS = 5
+
+# Метки чтения из основной БД после записи видны всем воркерам
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'replica_pin': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': Path(tempfile.gettempdir()) / 'shop_replica_pin',
+    },
+}
+
+REPLICA_PIN_CACHE = 'replica_pin'
+
+REPLICA_HEALTH_CHECK_INTERVAL = 10
+
+# QueryBudgetMiddleware проверяет каждый запрос и выполняет EXPLAIN для
+# медленных, поэтому по умолчанию включён только при отладке
+QUERY_GUARD_ENABLED = DEBUG
+
+# Порог N+1 (повторов одного запроса) и медленного запроса для QueryGuard
+QUERY_GUARD_REPEAT_THRESHOLD = 5
+
+QUERY_GUARD_SLOW_MS = 100
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -90,7 +141,31 @@ REST_FRAMEWORK = {
 
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework.authentication.TokenAuthentication',
-    ]
+    ],
+
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.ShopJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+
+    'DEFAULT_THROTTLE_CLASSES': [
+        'api.throttling.TokenBucketThrottle',
+    ],
+
+    'DEFAULT_THROTTLE_RATES': {
+        'catalogue': '600/min',
+        'cart': '300/min',
+        'cart_write': '60/min',
+        'auth': '10/min',
+    }
+}
+
+# LocalBucketStore - память процесса, SharedMemoryBucketStore - общий файл
+# для всех воркеров gunicorn (только Unix), RedisBucketStore - Redis
+# (OPTIONS: {'url': 'redis://...'})
+THROTTLE_BUCKET_STORE = {
+    'BACKEND': 'api.throttling.LocalBucketStore',
+    'OPTIONS': {},
 }
 
 MEDIA_URL = '/media/'
@@ -0,0 +1,122 @@
+import os
+import sqlite3
+import tempfile
+from unittest import mock
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from products.models import Category, Product, SubCategory
+from .routers import (
+    NOT_CHOSEN, ReplicaRouter, ReplicaRoutingMiddleware, _current_replica
+)
+
+REPLICAS = ['replica_0', 'replica_1']
+
+
+class HealthyReplicaRouter(ReplicaRouter):
+    def is_healthy(self, alias):
+        return True
+
+
+@override_settings(DATABASE_REPLICAS=REPLICAS)
+class ReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        self.router = HealthyReplicaRouter()
+
+    def test_replica_is_chosen_per_read_outside_request(self):
+        self.assertEqual(
+            [self.router.db_for_read(Product) for _ in REPLICAS], REPLICAS
+        )
+
+    def test_replica_is_kept_within_request(self):
+        token = _current_replica.set(NOT_CHOSEN)
+        try:
+            aliases = {self.router.db_for_read(Product) for _ in REPLICAS}
+        finally:
+            _current_replica.reset(token)
+        self.assertEqual(len(aliases), 1)
+
+
+@override_settings(DATABASE_REPLICAS=REPLICAS)
+class ReplicaHealthCheckTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def replica(self, alias, name, tables=()):
+        path = os.path.join(self.directory, name)
+        if tables:
+            with sqlite3.connect(path) as connection:
+                for table in tables:
+                    connection.execute(f'CREATE TABLE {table} (id integer)')
+        wrapper = DatabaseWrapper({
+            **connections['default'].settings_dict,
+            'NAME': f'file:{path}?mode=ro',
+            'OPTIONS': {},
+        }, alias)
+        self.addCleanup(wrapper.close)
+        return wrapper
+
+    def route(self, replicas):
+        databases = {'default': connections['default'], **replicas}
+        with mock.patch('shop_project.routers.connections', databases):
+            router = ReplicaRouter()
+            return [router.db_for_read(Product) for _ in REPLICAS]
+
+    def test_replica_without_catalogue_falls_back_to_default(self):
+        aliases = self.route({
+            'replica_0': self.replica('replica_0', 'missing.sqlite3'),
+            'replica_1': self.replica('replica_1', 'empty.sqlite3', ['t']),
+        })
+        self.assertEqual(aliases, ['default', 'default'])
+        self.assertFalse(
+            os.path.exists(os.path.join(self.directory, 'missing.sqlite3'))
+        )
+
+    def test_unhealthy_replica_is_skipped(self):
+        tables = [
+            model._meta.db_table for model in (Category, SubCategory, Product)
+        ]
+        aliases = self.route({
+            'replica_0': self.replica('replica_0', 'missing.sqlite3'),
+            'replica_1': self.replica('replica_1', 'replica.sqlite3', tables),
+        })
+        self.assertEqual(aliases, ['replica_1', 'replica_1'])
+
+
+@override_settings(DATABASE_REPLICAS=REPLICAS)
+class ReplicaRoutingMiddlewareTests(SimpleTestCase):
+    def setUp(self):
+        self.router = HealthyReplicaRouter()
+        self.reads = []
+        self.middleware = ReplicaRoutingMiddleware(self.view)
+        self.middleware.cache.clear()
+        self.factory = RequestFactory()
+
+    def view(self, request):
+        self.reads.append(self.router.db_for_read(Product))
+        return HttpResponse()
+
+    def request(self, method, token):
+        return self.middleware(getattr(self.factory, method)(
+            '/api/shopping_cart/', HTTP_AUTHORIZATION=f'Token {token}'
+        ))
+
+    def test_write_pins_reads_of_same_token_to_primary(self):
+        self.request('get', 'first')
+        self.request('post', 'first')
+        self.request('get', 'first')
+        self.request('get', 'second')
+        self.assertNotEqual(self.reads[0], 'default')
+        self.assertEqual(self.reads[2], 'default')
+        self.assertNotEqual(self.reads[3], 'default')
+
+    @override_settings(REPLICA_PIN_CACHE='default')
+    def test_process_local_cache_is_rejected(self):
+        with self.assertRaises(ImproperlyConfigured):
+            ReplicaRoutingMiddleware(self.view)